@@ -2,19 +2,22 @@ from __future__ import annotations
 
 import os
 import time
-from typing import Callable
 
 from opentelemetry import propagate, trace
 from opentelemetry.trace import SpanKind, StatusCode
-from starlette.concurrency import iterate_in_threadpool
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
 
 from .logging import DEFAULT_REDACT_KEYS, build_body_preview, log_json
+from .span import _active_span_and_trace_hex
 
 
-class TraceAccessLogMiddleware(BaseHTTPMiddleware):
+class TraceAccessLogMiddleware:
+    """Pure ASGI access-log middleware.
+
+    Implemented against the raw ASGI protocol instead of Starlette's
+    BaseHTTPMiddleware, which wraps every request in an extra anyio task and
+    memory object stream and is documented as significantly slower.
+    """
+
     def __init__(
         self,
         app,
@@ -25,105 +28,174 @@ class TraceAccessLogMiddleware(BaseHTTPMiddleware):
         response_body_preview_paths: list[str] | None = None,
         response_body_preview_redact_keys: list[str] | None = None,
     ):
-        super().__init__(app)
+        self.app = app
         self._logger = logger
+        # get_tracer takes the provider lock for a registry lookup; resolve
+        # once instead of per request.
+        self._tracer = trace.get_tracer("observability-log-py/fastapi")
         self._trace_header_name = trace_header_name
+        self._trace_header_raw = trace_header_name.lower().encode("latin-1")
         self._enable_response_body_preview = enable_response_body_preview
         self._response_body_preview_max_bytes = max(response_body_preview_max_bytes, 1)
         self._response_body_preview_paths = [path.strip() for path in (response_body_preview_paths or []) if path and path.strip()]
+        self._exact_paths = frozenset(self._response_body_preview_paths)
+        self._prefix_paths = tuple(self._response_body_preview_paths)
         self._response_body_preview_redact_keys = response_body_preview_redact_keys or []
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
-        tracer = trace.get_tracer("observability-log-py/fastapi")
-        start = time.perf_counter()
-        should_capture_body = self._should_capture_path(request.url.path)
-        request_body = await self._extract_request_body(request) if should_capture_body else None
-        current_span = trace.get_current_span()
-        current_ctx = current_span.get_span_context() if current_span else None
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # When auto instrumentation is enabled, reuse current server span to avoid duplicate server spans.
-        if current_ctx and current_ctx.is_valid:
-            try:
-                response = await call_next(request)
-            except Exception as err:
-                current_span.record_exception(err)
-                current_span.set_status(StatusCode.ERROR, str(err))
-                raise
-            return await self._finalize_response(current_span, request, response, start, request_body)
-
-        parent_ctx = propagate.extract(request.headers)
-        with tracer.start_as_current_span(
-            f"{request.method} {request.url.path}",
+        current_span, current_trace_hex = _active_span_and_trace_hex()
+        if current_trace_hex is not None:
+            await self._run(scope, receive, send, current_span, current_trace_hex)
+            return
+
+        carrier = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope.get("headers", [])
+        }
+        parent_ctx = propagate.extract(carrier)
+        with self._tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
             context=parent_ctx,
             kind=SpanKind.SERVER,
         ) as span:
-            try:
-                response = await call_next(request)
-            except Exception as err:
-                span.record_exception(err)
-                span.set_status(StatusCode.ERROR, str(err))
-                raise
-            return await self._finalize_response(span, request, response, start, request_body)
-
-    async def _finalize_response(
-        self,
-        span,
-        request: Request,
-        response: Response,
-        start: float,
-        request_body: bytes | None,
-    ) -> Response:
-        duration_ms = (time.perf_counter() - start) * 1000
-        span_context = span.get_span_context()
-        if span_context and span_context.is_valid:
-            response.headers[self._trace_header_name] = format(span_context.trace_id, "032x")
+            span_context = span.get_span_context()
+            trace_id_hex = (
+                f"{span_context.trace_id:032x}"
+                if span_context and span_context.is_valid
+                else None
+            )
+            await self._run(scope, receive, send, span, trace_id_hex)
+
+    async def _run(self, scope, receive, send, span, trace_id_hex) -> None:
+        method = scope["method"]
+        path = scope["path"]
+        start = time.perf_counter()
+        capture = self._should_capture_path(path)
+        request_body = bytearray() if capture else None
+        # Most responses (e.g. JSONResponse) arrive as one complete body
+        # message; keep a reference to that chunk and only fall back to a
+        # growing buffer for genuinely streamed responses.
+        response_first = b""
+        response_extra: bytearray | None = None
+        capture_cap = self._response_body_preview_max_bytes * 2
+        status_code = 500
+
+        if request_body is None:
+            wrapped_receive = receive
+        else:
+
+            async def wrapped_receive():
+                message = await receive()
+                if message["type"] == "http.request":
+                    request_body.extend(message.get("body", b""))
+                return message
+
+        async def wrapped_send(message) -> None:
+            nonlocal status_code, response_first, response_extra
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                status_code = message["status"]
+                if trace_id_hex is not None:
+                    # Rebuild the header list: the spec only promises an
+                    # iterable of pairs, and replacing any app-set entry
+                    # matches the old response.headers[name] = ... semantics.
+                    headers = [
+                        (name, value)
+                        for name, value in message.get("headers") or []
+                        if name.lower() != self._trace_header_raw
+                    ]
+                    headers.append((self._trace_header_raw, trace_id_hex.encode("latin-1")))
+                    message["headers"] = headers
+            elif message_type == "http.response.body" and capture:
+                chunk = message.get("body", b"")
+                if chunk:
+                    if response_extra is not None:
+                        # Stop buffering once the preview limit is comfortably
+                        # exceeded; long streams should not be held in memory
+                        # just to be cut down to a preview. The overshoot
+                        # keeps the truncation flag reliable.
+                        if len(response_extra) <= capture_cap:
+                            response_extra.extend(chunk)
+                    elif not response_first:
+                        response_first = chunk
+                    else:
+                        response_extra = bytearray(response_first)
+                        response_extra.extend(chunk)
+                        response_first = b""
+            await send(message)
 
-        if response.status_code >= 500:
+        try:
+            await self.app(scope, wrapped_receive, wrapped_send)
+        except Exception as err:
+            span.record_exception(err)
+            span.set_status(StatusCode.ERROR, str(err))
+            raise
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        if status_code >= 500:
             span.set_status(StatusCode.ERROR)
         else:
             span.set_status(StatusCode.OK)
-        span.set_attribute("http.method", request.method)
-        span.set_attribute("http.target", request.url.path)
-        span.set_attribute("http.status_code", response.status_code)
-        span.set_attribute("http.server_duration_ms", round(duration_ms, 3))
+        attrs = {
+            "http.method": method,
+            "http.target": path,
+            "http.status_code": status_code,
+            "http.server_duration_ms": round(duration_ms, 3),
+        }
+
+        user_agent = ""
+        for key, value in scope.get("headers", []):
+            if key == b"user-agent":
+                user_agent = value.decode("latin-1")
+                break
 
         fields = {
-            "http_method": request.method,
-            "http_path": request.url.path,
-            "http_status": response.status_code,
+            "http_method": method,
+            "http_path": path,
+            "http_status": status_code,
             "duration_ms": round(duration_ms, 3),
-            "user_agent": request.headers.get("user-agent", ""),
+            "user_agent": user_agent,
         }
-        if self._should_capture_path(request.url.path):
+        if capture:
             request_preview, request_truncated, request_size = build_body_preview(
-                request_body,
+                bytes(request_body),
                 max_bytes=self._response_body_preview_max_bytes,
                 redact_keys=self._response_body_preview_redact_keys,
             )
             if request_size > 0:
                 fields["http_request_body_size"] = request_size
-                span.set_attribute("http_request_body_size", request_size)
+                attrs["http_request_body_size"] = request_size
             if request_preview:
                 fields["http_request_body_preview"] = request_preview
-                span.set_attribute("http_request_body_preview", request_preview)
+                attrs["http_request_body_preview"] = request_preview
             if request_truncated:
                 fields["http_request_body_preview_truncated"] = True
-                span.set_attribute("http_request_body_preview_truncated", True)
+                attrs["http_request_body_preview_truncated"] = True
 
-            body = await self._extract_response_body(response)
+            response_body = bytes(response_extra) if response_extra is not None else response_first
             preview, truncated, size = build_body_preview(
-                body,
+                response_body,
                 max_bytes=self._response_body_preview_max_bytes,
                 redact_keys=self._response_body_preview_redact_keys,
             )
             if size > 0:
                 fields["http_response_body_size"] = size
-                span.set_attribute("http_response_body_size", size)
+                attrs["http_response_body_size"] = size
             if preview:
                 fields["http_response_body_preview"] = preview
-                span.set_attribute("http_response_body_preview", preview)
+                attrs["http_response_body_preview"] = preview
             if truncated:
                 fields["http_response_body_preview_truncated"] = True
-                span.set_attribute("http_response_body_preview_truncated", True)
+                attrs["http_response_body_preview_truncated"] = True
+
+        # One SDK call: set_attributes takes the attribute-limit lock once
+        # instead of once per key.
+        span.set_attributes(attrs)
 
         log_json(
             self._logger,
@@ -131,40 +203,15 @@ class TraceAccessLogMiddleware(BaseHTTPMiddleware):
             "incoming request handled",
             fields=fields,
         )
-        return response
 
     def _should_capture_path(self, path: str) -> bool:
         if not self._enable_response_body_preview:
             return False
-        if not self._response_body_preview_paths:
+        if not self._prefix_paths:
             return True
-        return any(path == allowed or path.startswith(allowed) for allowed in self._response_body_preview_paths)
-
-    async def _extract_request_body(self, request: Request) -> bytes | None:
-        try:
-            body = await request.body()
-        except Exception:
-            return None
-        return body if body else None
-
-    async def _extract_response_body(self, response: Response) -> bytes | None:
-        body = getattr(response, "body", None)
-        if body:
-            return body if isinstance(body, bytes) else str(body).encode("utf-8", errors="replace")
-
-        body_iterator = getattr(response, "body_iterator", None)
-        if body_iterator is None:
-            return None
-
-        chunks: list[bytes] = []
-        async for chunk in body_iterator:
-            if isinstance(chunk, bytes):
-                chunks.append(chunk)
-            else:
-                chunks.append(str(chunk).encode("utf-8", errors="replace"))
-        merged = b"".join(chunks)
-        response.body_iterator = iterate_in_threadpool(iter([merged]))
-        return merged
+        # str.startswith accepts a tuple and iterates in C, so no Python-level
+        # loop runs per request.
+        return path in self._exact_paths or path.startswith(self._prefix_paths)
 
 
 def _parse_bool_env(name: str, default: bool = False) -> bool:
@@ -223,4 +270,3 @@ def add_fastapi_observability(app, logger, **overrides):
         response_body_preview_redact_keys=response_body_preview_redact_keys,
     )
     return app
-
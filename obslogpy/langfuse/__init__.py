@@ -19,6 +19,7 @@ from .litellm import (
     DEFAULT_TRACE_UUID,
     build_trace_headers,
     instrumented_acompletion,
+    instrumented_acompletion_batch,
     observed_instrumented_acompletion,
 )
 
@@ -30,6 +31,7 @@ __all__ = [
     "extract_user_id_from_body",
     "get_langfuse",
     "instrumented_acompletion",
+    "instrumented_acompletion_batch",
     "langfuse_flush_at_request_end",
     "build_trace_headers",
     "observed_instrumented_acompletion",
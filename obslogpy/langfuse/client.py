@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import logging
-from contextlib import contextmanager
+from contextlib import nullcontext
 from functools import lru_cache
-from typing import Any, Iterator
+from typing import Any
 
 from .config import LangfuseSettings
 
@@ -21,8 +21,17 @@ def _cached_default_settings() -> LangfuseSettings:
     return LangfuseSettings.from_env()
 
 
+# Keyed by settings value: equal-by-value settings (e.g. repeated
+# from_env() calls) share one client, and the lru_cache bound evicts
+# rather than leaking a Langfuse client + TracerProvider per distinct
+# settings object. Env-configured callers resolve through
+# _cached_default_settings(), so the common path hashes one shared instance.
 @lru_cache(maxsize=8)
 def _cached_client(settings: LangfuseSettings):
+    return _build_client(settings)
+
+
+def _build_client(settings: LangfuseSettings):
     if not settings.is_configured_for_tracing():
         return None
     if Langfuse is None:
@@ -73,17 +82,24 @@ def set_langfuse_trace_attributes(
 
     if user_id or session_id:
         try:
-            payload: dict[str, str] = {}
-            if user_id:
-                payload["user_id"] = user_id
-            if session_id:
-                payload["session_id"] = session_id
-            langfuse.update_current_trace(**payload)
+            # Direct keyword calls; no per-request payload dict to build and
+            # splat. The SDK does not document tolerating explicit None, so
+            # branch on the three populated combinations.
+            if user_id and session_id:
+                langfuse.update_current_trace(user_id=user_id, session_id=session_id)
+            elif user_id:
+                langfuse.update_current_trace(user_id=user_id)
+            else:
+                langfuse.update_current_trace(session_id=session_id)
         except Exception:
             logger.warning("Langfuse update_current_trace failed", exc_info=True)
 
 
-@contextmanager
+# Shared no-op context manager: nullcontext keeps no state, so one instance
+# serves every tracing-disabled call without generator machinery.
+_NULL_CM = nullcontext(None)
+
+
 def open_span(
     *,
     name: str,
@@ -91,22 +107,19 @@ def open_span(
     metadata: dict[str, Any] | None = None,
     langfuse: Any | None = None,
     settings: LangfuseSettings | None = None,
-) -> Iterator[Any | None]:
+) -> Any:
     """Open a Langfuse span when tracing is available, otherwise no-op."""
     langfuse = langfuse or get_langfuse(settings)
     if langfuse is None:
-        yield None
-        return
+        return _NULL_CM
 
-    with langfuse.start_as_current_span(
+    return langfuse.start_as_current_span(
         name=name,
         trace_context=trace_context,
         metadata=metadata,
-    ) as span:
-        yield span
+    )
 
 
-@contextmanager
 def open_observation(
     *,
     as_type: str,
@@ -117,19 +130,17 @@ def open_observation(
     metadata: dict[str, Any] | None = None,
     langfuse: Any | None = None,
     settings: LangfuseSettings | None = None,
-) -> Iterator[Any | None]:
+) -> Any:
     """Open a Langfuse observation when tracing is available, otherwise no-op."""
     langfuse = langfuse or get_langfuse(settings)
     if langfuse is None:
-        yield None
-        return
+        return _NULL_CM
 
-    with langfuse.start_as_current_observation(
+    return langfuse.start_as_current_observation(
         as_type=as_type,
         name=name,
         model=model,
         input=input,
         model_parameters=model_parameters,
         metadata=metadata,
-    ) as observation:
-        yield observation
+    )
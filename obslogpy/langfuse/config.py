@@ -3,15 +3,18 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 
+_ENV = os.environ
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
 
 def _parse_bool_env(name: str, default: bool = False) -> bool:
-    raw = os.getenv(name, "").strip().lower()
+    raw = _ENV.get(name, "").strip().lower()
     if raw == "":
         return default
-    return raw in ("1", "true", "yes", "on")
+    return raw in _TRUE_VALUES
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LangfuseSettings:
     host: str = ""
     public_key: str = ""
@@ -22,9 +25,9 @@ class LangfuseSettings:
     @classmethod
     def from_env(cls) -> "LangfuseSettings":
         return cls(
-            host=os.getenv("LANGFUSE_HOST", "").strip(),
-            public_key=os.getenv("LANGFUSE_PUBLIC_KEY", "").strip(),
-            secret_key=os.getenv("LANGFUSE_SECRET_KEY", "").strip(),
+            host=_ENV.get("LANGFUSE_HOST", "").strip(),
+            public_key=_ENV.get("LANGFUSE_PUBLIC_KEY", "").strip(),
+            secret_key=_ENV.get("LANGFUSE_SECRET_KEY", "").strip(),
             tracing_enabled=_parse_bool_env("LANGFUSE_TRACING_ENABLED", False),
             flush_at_request_end=_parse_bool_env("LANGFUSE_FLUSH_AT_REQUEST_END", True),
         )
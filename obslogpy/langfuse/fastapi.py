@@ -2,28 +2,39 @@ from __future__ import annotations
 
 import json
 import logging
-import re
-from typing import Callable
+import sys
 
+try:
+    from orjson import loads as _json_loads
+except Exception:  # pragma: no cover - optional dependency
+    _json_loads = json.loads
+
+from opentelemetry import context as otel_context
 from opentelemetry import trace
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
 
+from ..span import _active_span_and_trace_hex
 from .client import (
+    _cached_default_settings,
     get_langfuse,
     langfuse_flush_at_request_end,
     open_span,
     set_langfuse_trace_attributes,
 )
 from .config import LangfuseSettings
-from .context import preserve_otel_parent_span
 
 logger = logging.getLogger(__name__)
 
-_TRACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
-_WRITE_METHODS = {"POST", "PUT", "PATCH"}
+_HEX_DIGITS_ANYCASE = frozenset("0123456789abcdefABCDEF")
+# Interned members make the membership test an identity-then-hash compare,
+# since ASGI servers hand us already-interned method strings.
+_WRITE_METHODS = frozenset({sys.intern("POST"), sys.intern("PUT"), sys.intern("PATCH")})
+_JSON_CONTENT_TYPE = b"application/json"
 _MAX_SESSION_ID_LENGTH = 200
+# Never buffer request bodies larger than this just to read trace attributes.
+_MAX_TRACE_ATTR_BODY_BYTES = 1024 * 1024
+# Only bodies small enough for a full parse to be cheap are inspected; only
+# the parse can tell top-level trace attrs from same-named nested keys.
+_TRACE_ATTR_FALLBACK_MAX_BYTES = 64 * 1024
 
 
 def resolve_langfuse_trace_id(
@@ -33,9 +44,11 @@ def resolve_langfuse_trace_id(
 ) -> tuple[str | None, str | None]:
     upstream_raw = (x_trace_id or "").strip()
     if upstream_raw:
-        candidate = upstream_raw.lower()
-        if _TRACE_ID_PATTERN.fullmatch(candidate):
-            return candidate, None
+        # Trivial shape; a set-membership check beats dispatching into the
+        # regex engine for 32 hex characters, and checking both cases up
+        # front means only valid ids pay for the lowercasing copy.
+        if len(upstream_raw) == 32 and _HEX_DIGITS_ANYCASE.issuperset(upstream_raw):
+            return upstream_raw.lower(), None
         return (otel_trace_id.strip().lower() if otel_trace_id else None), upstream_raw
 
     if not otel_trace_id:
@@ -57,9 +70,25 @@ def extract_trace_attrs_from_body(body: bytes, content_type: str | None) -> tupl
         return None, None
     if "application/json" not in (content_type or "").lower():
         return None, None
+    # Cheap substring scan first: skip any parsing when neither key can
+    # possibly be present in the payload. A key match anywhere in the bytes
+    # is only a hint — it cannot tell a top-level key from a nested one, so
+    # it never short-circuits to a positive answer.
+    if b'"user_id"' not in body and b'"session_id"' not in body and b'"sessionId"' not in body:
+        return None, None
+    if len(body) > _TRACE_ATTR_FALLBACK_MAX_BYTES:
+        # Too large to parse on the request path; report nothing rather than
+        # risk attributing the trace to a nested or list-element value.
+        return None, None
+    return _parse_trace_attrs(body)
+
+
+def _parse_trace_attrs(body: bytes) -> tuple[str | None, str | None]:
     try:
-        payload = json.loads(body)
-    except (UnicodeDecodeError, json.JSONDecodeError):
+        payload = _json_loads(body)
+    except ValueError:
+        # Covers UnicodeDecodeError plus both json.JSONDecodeError and
+        # orjson.JSONDecodeError, which are all ValueError subclasses.
         return None, None
     if not isinstance(payload, dict):
         return None, None
@@ -80,30 +109,46 @@ def extract_user_id_from_body(body: bytes, content_type: str | None) -> str | No
     return user_id
 
 
-def _restore_request_body(request: Request, body: bytes) -> None:
-    sent = False
+async def _drain_request_body(receive):
+    """Read the full request body, returning it plus a replaying receive."""
+    chunks = bytearray()
+    pending = None
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            pending = message
+            break
+        chunks.extend(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    body = bytes(chunks)
+
+    replayed = False
 
-    async def receive() -> dict:
-        nonlocal sent
-        if sent:
-            return {"type": "http.request", "body": b"", "more_body": False}
-        sent = True
-        return {"type": "http.request", "body": body, "more_body": False}
+    async def replay():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        if pending is not None:
+            return pending
+        return await receive()
 
-    request._receive = receive  # type: ignore[attr-defined]
+    return body, replay
 
 
 def _current_otel_trace_id() -> str | None:
-    span = trace.get_current_span()
-    if span is None:
-        return None
-    ctx = span.get_span_context()
-    if not ctx or not ctx.is_valid:
-        return None
-    return format(ctx.trace_id, "032x")
+    return _active_span_and_trace_hex()[1]
+
 
+class LangfuseTraceMiddleware:
+    """Pure ASGI Langfuse tracing middleware.
+
+    Implemented against the raw ASGI protocol instead of Starlette's
+    BaseHTTPMiddleware, which adds an anyio task + memory object stream per
+    request.
+    """
 
-class LangfuseTraceMiddleware(BaseHTTPMiddleware):
     def __init__(
         self,
         app,
@@ -112,45 +157,82 @@ class LangfuseTraceMiddleware(BaseHTTPMiddleware):
         session_header: str = "X-Session-Id",
         settings: LangfuseSettings | None = None,
     ) -> None:
-        super().__init__(app)
-        self._trace_header = trace_header
-        self._session_header = session_header
+        self.app = app
+        self._trace_header_raw = trace_header.lower().encode("latin-1")
+        self._session_header_raw = session_header.lower().encode("latin-1")
         self._settings = settings
+        # Resolve once; get_langfuse/langfuse_flush_at_request_end both go
+        # through lru_cache, which takes a lock on every call.
+        self._langfuse = get_langfuse(settings)
+        self._flush_at_end = langfuse_flush_at_request_end(settings)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
-        langfuse = get_langfuse(self._settings)
+        langfuse = self._langfuse
         if langfuse is None:
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+
+        # One pass over the raw scope headers; header names arrive already
+        # lowercased, so this avoids Starlette's case-insensitive scans.
+        x_trace_id: str | None = None
+        x_session_id: str | None = None
+        content_type_raw: bytes | None = None
+        content_length: int = -1
+        for name, value in scope.get("headers", []):
+            if name == self._trace_header_raw:
+                x_trace_id = value.decode("latin-1")
+            elif name == self._session_header_raw:
+                x_session_id = value.decode("latin-1")
+            elif name == b"content-type":
+                content_type_raw = value
+            elif name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    content_length = -1
 
         otel_parent_span = trace.get_current_span()
-        x_trace_id = request.headers.get(self._trace_header)
         otel_trace_id = _current_otel_trace_id()
         trace_id, upstream_raw = resolve_langfuse_trace_id(
             x_trace_id=x_trace_id,
             otel_trace_id=otel_trace_id,
         )
-        session_id, upstream_session_raw = resolve_langfuse_session_id(
-            request.headers.get(self._session_header)
-        )
+        session_id, upstream_session_raw = resolve_langfuse_session_id(x_session_id)
 
         user_id: str | None = None
         body_session_id: str | None = None
-        if request.method in _WRITE_METHODS:
-            body = await request.body()
-            _restore_request_body(request, body)
+        # Only buffer the body when extract_trace_attrs_from_body could use
+        # it: JSON content type and a known, bounded size. Multipart uploads
+        # and chunked streams pass through untouched.
+        if (
+            method in _WRITE_METHODS
+            and content_type_raw is not None
+            # Media types are case-insensitive; only lowercase when needed.
+            and content_type_raw.lower().startswith(_JSON_CONTENT_TYPE)
+            and 0 <= content_length <= _MAX_TRACE_ATTR_BODY_BYTES
+        ):
+            body, receive = await _drain_request_body(receive)
             user_id, body_session_id = extract_trace_attrs_from_body(
-                body, request.headers.get("content-type")
+                body, content_type_raw.decode("latin-1")
             )
 
         if not session_id and body_session_id:
             session_id, upstream_session_raw = resolve_langfuse_session_id(body_session_id)
 
         if not trace_id:
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         metadata: dict = {
-            "http.method": request.method,
-            "http.path": request.url.path,
+            "http.method": method,
+            "http.path": path,
         }
         if upstream_raw:
             metadata["upstream_trace_id_raw"] = upstream_raw
@@ -159,10 +241,10 @@ class LangfuseTraceMiddleware(BaseHTTPMiddleware):
         if upstream_session_raw:
             metadata["upstream_session_id_raw"] = upstream_session_raw
 
-        flush_at_end = langfuse_flush_at_request_end(self._settings)
+        flush_at_end = self._flush_at_end
 
         with open_span(
-            name=f"{request.method} {request.url.path}",
+            name=f"{method} {path}",
             trace_context={"trace_id": trace_id},
             metadata=metadata,
             langfuse=langfuse,
@@ -174,9 +256,13 @@ class LangfuseTraceMiddleware(BaseHTTPMiddleware):
                 settings=self._settings,
             )
             try:
-                with preserve_otel_parent_span(otel_parent_span):
-                    response = await call_next(request)
-                return response
+                # Inlined preserve_otel_parent_span: skips the generator-based
+                # contextmanager protocol on the per-request path.
+                token = otel_context.attach(trace.set_span_in_context(otel_parent_span))
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    otel_context.detach(token)
             except Exception as err:
                 try:
                     langfuse.update_current_span(
@@ -203,7 +289,9 @@ def add_langfuse_tracing(
     session_header: str = "X-Session-Id",
 ) -> bool:
     """One-liner API for business apps to enable Langfuse request tracing."""
-    resolved_settings = settings or LangfuseSettings.from_env()
+    # The shared default-settings instance keeps the identity-keyed client
+    # cache stable: every env-configured caller resolves to the same object.
+    resolved_settings = settings or _cached_default_settings()
     if not resolved_settings.is_configured_for_tracing():
         return False
 
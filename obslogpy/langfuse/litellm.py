@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 import time
+from functools import lru_cache
 from typing import Any
 
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
 from opentelemetry import trace
 from opentelemetry.trace import StatusCode
 
@@ -15,10 +23,37 @@ from .context import preserve_otel_parent_span
 logger = logging.getLogger(__name__)
 DEFAULT_TRACE_UUID = "123e4567-e89b-12d3-a456-426614174000"
 
-try:
-    from litellm import acompletion
-except Exception:  # pragma: no cover - optional dependency
-    acompletion = None  # type: ignore[assignment]
+# Operational kill switch: skip all body-preview serialization without a
+# redeploy. Read once at import, like the other env-driven settings.
+_DISABLE_PREVIEW = os.getenv("OBSLOG_DISABLE_BODY_PREVIEW", "").lower() in ("1", "true", "yes")
+
+# litellm pulls in dozens of provider SDKs at import time; resolve lazily on
+# the first call instead of paying that at process start. The module-level
+# `acompletion` attribute stays the patch point for tests.
+acompletion = None  # type: ignore[assignment]
+_LITELLM_IMPORT_FAILED = False
+
+
+def _resolve_acompletion():
+    global acompletion, _LITELLM_IMPORT_FAILED
+    if acompletion is not None:
+        return acompletion
+    if _LITELLM_IMPORT_FAILED:
+        return None
+    try:
+        from litellm import acompletion as resolved
+    except Exception:  # pragma: no cover - optional dependency
+        _LITELLM_IMPORT_FAILED = True
+        return None
+    acompletion = resolved
+    return resolved
+
+
+@lru_cache(maxsize=32)
+def _cached_tracer(name: str, provider):
+    # Keyed on the provider object (identity hash) so a swapped provider gets
+    # fresh tracers and a dropped provider's reused id cannot alias an entry.
+    return trace.get_tracer(name)
 
 
 def _safe_int(value: Any) -> int | None:
@@ -46,18 +81,18 @@ def _extract_output(resp: Any) -> dict[str, Any]:
     if not isinstance(resp, dict):
         return {"raw": str(resp)}
 
-    content = (
-        resp.get("choices", [{}])[0]
-        .get("message", {})
-        .get("content", "")
-    )
+    # EAFP: direct indexing allocates no throwaway defaults on the happy path.
+    try:
+        content = resp["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        content = ""
     return {
         "content": content,
     }
 
 
-def _extract_model_parameters(kwargs: dict[str, Any]) -> dict[str, Any]:
-    allow = (
+_ALLOWED_MODEL_PARAMS = frozenset(
+    {
         "temperature",
         "top_p",
         "max_tokens",
@@ -68,24 +103,45 @@ def _extract_model_parameters(kwargs: dict[str, Any]) -> dict[str, Any]:
         "seed",
         "response_format",
         "extra_body",
-    )
+    }
+)
+_SCALAR_TYPES = (bool, int, float, str, list, dict)
+
+
+def _extract_model_parameters(kwargs: dict[str, Any]) -> dict[str, Any]:
     out: dict[str, Any] = {}
-    for key in allow:
-        if key not in kwargs:
-            continue
-        value = kwargs.get(key)
-        if value is None or isinstance(value, (bool, int, float, str, list, dict)):
+    # Keys-view intersection keeps the work proportional to the smaller of
+    # the two sets instead of probing every allowlisted name.
+    for key in _ALLOWED_MODEL_PARAMS & kwargs.keys():
+        value = kwargs[key]
+        if value is None or isinstance(value, _SCALAR_TYPES):
             out[key] = value
         else:
             out[key] = str(value)
     return out
 
 
-def _preview_json(value: object, max_bytes: int = 4096) -> tuple[str, bool, int]:
-    encoded = json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+def _dumps_bytes(value: object) -> bytes:
+    # orjson serializes straight to UTF-8 bytes, skipping the str round-trip.
+    # OPT_NON_STR_KEYS matches stdlib behavior for non-string dict keys.
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _preview_from_bytes(encoded: bytes, max_bytes: int = 4096) -> tuple[str, bool, int]:
     if len(encoded) <= max_bytes:
         return encoded.decode("utf-8", errors="replace"), False, len(encoded)
-    return encoded[:max_bytes].decode("utf-8", errors="replace"), True, len(encoded)
+    # Back up to a UTF-8 sequence boundary so the cut never splits a
+    # multi-byte character; continuation bytes look like 0b10xxxxxx.
+    end = max_bytes
+    while end > 0 and (encoded[end] & 0xC0) == 0x80:
+        end -= 1
+    return encoded[:end].decode("utf-8"), True, len(encoded)
+
+
+def _preview_json(value: object, max_bytes: int = 4096) -> tuple[str, bool, int]:
+    return _preview_from_bytes(_dumps_bytes(value), max_bytes)
 
 
 def _build_default_request_payload(
@@ -98,15 +154,11 @@ def _build_default_request_payload(
         "model": model,
         "messages": messages,
     }
-    for key, value in kwargs.items():
-        if key == "api_key":
-            continue
-        if value is None:
-            continue
-        if isinstance(value, (bool, int, float, str, list, dict)):
-            payload[key] = value
-        else:
-            payload[key] = str(value)
+    payload.update(
+        (key, value if isinstance(value, _SCALAR_TYPES) else str(value))
+        for key, value in kwargs.items()
+        if key != "api_key" and value is not None
+    )
     return payload
 
 
@@ -134,22 +186,21 @@ async def instrumented_acompletion(
     settings: LangfuseSettings | None = None,
     **kwargs: Any,
 ) -> Any:
-    if acompletion is None:
+    acompletion_fn = _resolve_acompletion()
+    if acompletion_fn is None:
         raise RuntimeError(
             "litellm is not installed. Install with: pip install 'observability-log-py[langfuse]'"
         )
 
     langfuse = get_langfuse(settings)
     if langfuse is None:
-        return await acompletion(model=model, messages=messages, **kwargs)
+        return await acompletion_fn(model=model, messages=messages, **kwargs)
 
-    safe_kwargs = dict(kwargs)
-    safe_kwargs.pop("api_key", None)
-
-    model_parameters = _extract_model_parameters(safe_kwargs)
-    metadata = {}
-    if "base_url" in safe_kwargs:
-        metadata["litellm.base_url"] = safe_kwargs.get("base_url")
+    # api_key is not in the allowlist, so no defensive copy is needed to keep
+    # it out of the observation payload.
+    model_parameters = _extract_model_parameters(kwargs)
+    base_url = kwargs.get("base_url")
+    metadata = {"litellm.base_url": base_url} if base_url is not None else {}
 
     current_otel_span = trace.get_current_span()
 
@@ -165,7 +216,7 @@ async def instrumented_acompletion(
     ) as generation:
         try:
             with preserve_otel_parent_span(current_otel_span):
-                resp = await acompletion(model=model, messages=messages, **kwargs)
+                resp = await acompletion_fn(model=model, messages=messages, **kwargs)
         except Exception as err:
             if generation is not None:
                 try:
@@ -187,6 +238,29 @@ async def instrumented_acompletion(
         return resp
 
 
+async def instrumented_acompletion_batch(
+    calls: list[dict[str, Any]],
+    *,
+    max_concurrency: int = 50,
+    settings: LangfuseSettings | None = None,
+) -> list[Any]:
+    """Fan out multiple instrumented_acompletion calls under a concurrency cap.
+
+    Each entry in ``calls`` is a kwargs dict for instrumented_acompletion.
+    Results come back in call order; a failed call yields its exception in
+    place of a result instead of cancelling the rest of the batch.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    parent_span = trace.get_current_span()
+
+    async def _one(call: dict[str, Any]) -> Any:
+        async with semaphore:
+            with preserve_otel_parent_span(parent_span):
+                return await instrumented_acompletion(settings=settings, **call)
+
+    return await asyncio.gather(*(_one(call) for call in calls), return_exceptions=True)
+
+
 async def observed_instrumented_acompletion(
     *,
     tracer_name: str,
@@ -205,31 +279,40 @@ async def observed_instrumented_acompletion(
     **kwargs: Any,
 ) -> Any:
     """High-level wrapper that keeps business code free from tracing details."""
-    tracer = trace.get_tracer(tracer_name)
+    tracer = _cached_tracer(tracer_name, trace.get_tracer_provider())
     with tracer.start_as_current_span(span_name) as span:
-        span.set_attribute("llm.model", model)
+        attrs: dict[str, Any] = {"llm.model": model}
         if user_id:
-            span.set_attribute("app.user_id", user_id)
+            attrs["app.user_id"] = user_id
         if session_id:
-            span.set_attribute("app.session_id", session_id)
+            attrs["app.session_id"] = session_id
         if extra_span_attrs:
             for key, value in extra_span_attrs.items():
                 if value is not None:
-                    span.set_attribute(key, value)
+                    attrs[key] = value
+
+        # Don't serialize what nobody will record: sampled-out spans and a
+        # zero byte budget both skip the preview entirely.
+        record_previews = (
+            not _DISABLE_PREVIEW and preview_max_bytes > 0 and span.is_recording()
+        )
 
         effective_request_payload = request_payload or _build_default_request_payload(
             model=model,
             messages=messages,
             kwargs=kwargs,
         )
-        if effective_request_payload is not None:
-            req_preview, req_truncated, req_size = _preview_json(
-                effective_request_payload,
+        if record_previews and effective_request_payload is not None:
+            request_encoded = _dumps_bytes(effective_request_payload)
+            req_preview, req_truncated, req_size = _preview_from_bytes(
+                request_encoded,
                 max_bytes=preview_max_bytes,
             )
-            span.set_attribute("http_request_body_preview", req_preview)
-            span.set_attribute("http_request_body_preview_truncated", req_truncated)
-            span.set_attribute("http_request_body_size", req_size)
+            attrs["http_request_body_preview"] = req_preview
+            attrs["http_request_body_preview_truncated"] = req_truncated
+            attrs["http_request_body_size"] = req_size
+        # Batched: set_attributes takes the SDK attribute lock once.
+        span.set_attributes(attrs)
 
         call_kwargs = dict(kwargs)
         if base_url is not None:
@@ -237,7 +320,7 @@ async def observed_instrumented_acompletion(
         if api_key is not None:
             call_kwargs["api_key"] = api_key
 
-        start = time.perf_counter()
+        start_ns = time.monotonic_ns()
         try:
             resp = await instrumented_acompletion(
                 name=generation_name,
@@ -251,24 +334,28 @@ async def observed_instrumented_acompletion(
             span.set_status(StatusCode.ERROR, str(err))
             raise
 
-        duration_ms = (time.perf_counter() - start) * 1000
-        span.set_attribute("llm.duration_ms", round(duration_ms, 3))
+        # Integer clock read and subtraction; only the final division floats.
+        duration_ms = (time.monotonic_ns() - start_ns) / 1_000_000
 
-        resp_preview, resp_truncated, resp_size = _preview_json(
-            resp,
-            max_bytes=preview_max_bytes,
-        )
-        span.set_attribute("http_response_body_preview", resp_preview)
-        span.set_attribute("http_response_body_preview_truncated", resp_truncated)
-        span.set_attribute("http_response_body_size", resp_size)
-
-        content = (
-            resp.get("choices", [{}])[0]
-            .get("message", {})
-            .get("content", "")
-            if isinstance(resp, dict)
-            else ""
-        )
+        response_attrs: dict[str, Any] = {"llm.duration_ms": round(duration_ms, 3)}
+        if record_previews:
+            response_encoded = _dumps_bytes(resp)
+            resp_preview, resp_truncated, resp_size = _preview_from_bytes(
+                response_encoded,
+                max_bytes=preview_max_bytes,
+            )
+            response_attrs["http_response_body_preview"] = resp_preview
+            response_attrs["http_response_body_preview_truncated"] = resp_truncated
+            response_attrs["http_response_body_size"] = resp_size
+
+        if isinstance(resp, dict):
+            try:
+                content = resp["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                content = ""
+        else:
+            content = ""
         if isinstance(content, str):
-            span.set_attribute("llm.output_length", len(content))
+            response_attrs["llm.output_length"] = len(content)
+        span.set_attributes(response_attrs)
         return resp
@@ -1,10 +1,33 @@
 import json
 import os
+import re
+from collections import deque
 from datetime import datetime, timezone
+from functools import lru_cache
 from logging import Logger
 from typing import Any
 
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
 from opentelemetry import trace
+from opentelemetry.trace import INVALID_SPAN
+
+
+def _dumps_bytes(value: Any) -> bytes:
+    if orjson is not None:
+        # OPT_NON_STR_KEYS coerces non-string dict keys like stdlib json does;
+        # without it orjson raises TypeError on e.g. {"counts": {200: 5}}.
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _loads(raw: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 DEFAULT_REDACT_KEYS = {
     "authorization",
@@ -21,17 +44,51 @@ DEFAULT_REDACT_KEYS = {
 }
 
 
+_DEFAULT_REDACT_KEYS_NORMALIZED = frozenset(k.lower().strip() for k in DEFAULT_REDACT_KEYS if k)
+
+
+@lru_cache(maxsize=32)
+def _normalize_redact_keys(keys: frozenset[str]) -> frozenset[str]:
+    return frozenset(k.lower().strip() for k in keys if k)
+
+
+def _resolve_redact_keys(redact_keys: set[str] | list[str] | None) -> frozenset[str]:
+    if not redact_keys:
+        return _DEFAULT_REDACT_KEYS_NORMALIZED
+    return _normalize_redact_keys(frozenset(redact_keys))
+
+
+@lru_cache(maxsize=32)
+def _compile_redact(keys: frozenset[str]) -> re.Pattern[str]:
+    # An empty key set would compile to the empty pattern, which matches
+    # every key; match nothing instead, as the substring loop used to.
+    if not keys:
+        return re.compile(r"(?!)")
+    # Longest-first alternation so overlapping keys match greedily; one
+    # C-level scan replaces a Python substring check per redact key.
+    return re.compile("|".join(map(re.escape, sorted(keys, key=len, reverse=True))))
+
+
+@lru_cache(maxsize=4096)
+def _fmt_ids(trace_id: int, span_id: int) -> tuple[str, str]:
+    return f"{trace_id:032x}", f"{span_id:016x}"
+
+
+# Shared empty result lets callers skip payload.update entirely via a
+# truthiness check; it is never mutated.
+_EMPTY_TRACE_FIELDS: dict[str, str] = {}
+
+
 def _trace_fields() -> dict[str, str]:
     span = trace.get_current_span()
-    if span is None:
-        return {}
+    if span is None or span is INVALID_SPAN:
+        return _EMPTY_TRACE_FIELDS
     span_context = span.get_span_context()
     if not span_context or not span_context.is_valid:
-        return {}
-    return {
-        "trace_id": format(span_context.trace_id, "032x"),
-        "span_id": format(span_context.span_id, "016x"),
-    }
+        return _EMPTY_TRACE_FIELDS
+    # Memoized: every log line within one span reuses the same hex strings.
+    tid, sid = _fmt_ids(span_context.trace_id, span_context.span_id)
+    return {"trace_id": tid, "span_id": sid}
 
 
 def build_payload(
@@ -49,7 +106,9 @@ def build_payload(
         "time": datetime.now(timezone.utc).isoformat(),
         "level": level,
     }
-    payload.update(_trace_fields())
+    trace_fields = _trace_fields()
+    if trace_fields:
+        payload.update(trace_fields)
     if fields:
         payload.update(fields)
     return payload
@@ -61,24 +120,38 @@ def build_body_preview(
     max_bytes: int = 2048,
     redact_keys: set[str] | list[str] | None = None,
 ) -> tuple[str, bool, int]:
-    if body is None:
+    if body is None or not body:
         return "", False, 0
+    limit = max(max_bytes, 1)
 
     if isinstance(body, bytes):
-        raw = body
-    else:
+        body_size = len(body)
+        sanitized = _sanitize_body(body, redact_keys)
+        truncated = len(sanitized) > limit
+        if truncated:
+            sanitized = sanitized[:limit]
+        return sanitized.decode("utf-8", errors="replace"), truncated, body_size
+
+    # str bodies: parse directly so JSON documents are still redacted in
+    # full, without the up-front whole-body encode.
+    sanitized = _sanitize_json_text(body, redact_keys)
+    if sanitized is not None:
+        body_size = len(sanitized)
+        truncated = body_size > limit
+        if truncated:
+            sanitized = sanitized[:limit]
+        return sanitized.decode("utf-8", errors="replace"), truncated, body_size
+
+    # Non-JSON text: nothing to redact, so only the preview prefix is ever
+    # encoded. For oversized bodies the reported size is the character
+    # count, a lower bound on the UTF-8 byte size.
+    if len(body) <= limit:
         raw = body.encode("utf-8", errors="replace")
-
-    body_size = len(raw)
-    if body_size == 0:
-        return "", False, 0
-
-    sanitized = _sanitize_body(raw, redact_keys)
-    limit = max(max_bytes, 1)
-    truncated = len(sanitized) > limit
-    if truncated:
-        sanitized = sanitized[:limit]
-    return sanitized.decode("utf-8", errors="replace"), truncated, body_size
+        truncated = len(raw) > limit
+        preview = raw[:limit] if truncated else raw
+        return preview.decode("utf-8", errors="replace"), truncated, len(raw)
+    preview = body[:limit].encode("utf-8", errors="replace")[:limit]
+    return preview.decode("utf-8", errors="replace"), True, len(body)
 
 
 def log_json(
@@ -97,7 +170,7 @@ def log_json(
         application_name=application_name,
         fields=fields,
     )
-    line = json.dumps(payload, ensure_ascii=False, default=str)
+    line = _dumps_bytes(payload).decode("utf-8")
     level_name = level.lower()
     if level_name == "error":
         logger.error(line)
@@ -109,37 +182,53 @@ def log_json(
         logger.info(line)
 
 
+def _sanitize_json_text(text: str, redact_keys: set[str] | list[str] | None) -> bytes | None:
+    try:
+        obj = _loads(text)
+    except Exception:
+        return None
+
+    _sanitize_value(obj, _compile_redact(_resolve_redact_keys(redact_keys)))
+    try:
+        return _dumps_bytes(obj)
+    except Exception:
+        return None
+
+
 def _sanitize_body(raw: bytes, redact_keys: set[str] | list[str] | None) -> bytes:
     try:
-        obj = json.loads(raw.decode("utf-8"))
+        obj = _loads(raw)
     except Exception:
         return raw
 
-    keys = set(k.lower().strip() for k in (redact_keys or DEFAULT_REDACT_KEYS) if k)
-    _sanitize_value(obj, keys)
+    _sanitize_value(obj, _compile_redact(_resolve_redact_keys(redact_keys)))
     try:
-        return json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+        return _dumps_bytes(obj)
     except Exception:
         return raw
 
 
-def _sanitize_value(value: Any, redact_keys: set[str]) -> None:
-    if isinstance(value, dict):
-        for key in list(value.keys()):
-            normalized = str(key).lower().strip()
-            if _should_redact(normalized, redact_keys):
-                value[key] = "***"
-                continue
-            _sanitize_value(value[key], redact_keys)
-    elif isinstance(value, list):
-        for item in value:
-            _sanitize_value(item, redact_keys)
-
-
-def _should_redact(key: str, redact_keys: set[str]) -> bool:
+def _sanitize_value(root: Any, redact_pattern: re.Pattern[str]) -> None:
+    # Explicit worklist instead of recursion: deeply nested LLM payloads
+    # (tool calls, chat histories) would otherwise pay a Python frame per node.
+    stack = deque([root])
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key in list(node.keys()):
+                normalized = str(key).lower().strip()
+                if _should_redact(normalized, redact_pattern):
+                    node[key] = "***"
+                    continue
+                value = node[key]
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(item for item in node if isinstance(item, (dict, list)))
+
+
+def _should_redact(key: str, redact_pattern: re.Pattern[str]) -> bool:
     if not key:
         return False
-    if key in redact_keys:
-        return True
-    return any(candidate in key for candidate in redact_keys)
+    return redact_pattern.search(key) is not None
 
@@ -19,11 +19,9 @@ def _parse_otlp_endpoint(raw: str) -> tuple[str, bool]:
     endpoint = (raw or "").strip()
     if not endpoint:
         return "signoz-otel-collector:4317", True
-    if endpoint.startswith("http://"):
-        return endpoint[len("http://") :], True
     if endpoint.startswith("https://"):
-        return endpoint[len("https://") :], False
-    return endpoint, True
+        return endpoint.removeprefix("https://"), False
+    return endpoint.removeprefix("http://"), True
 
 
 def configure_logging(
@@ -2,9 +2,25 @@ from __future__ import annotations
 
 from typing import Any, Mapping
 
+from opentelemetry import trace
 from opentelemetry.trace import StatusCode
 
 
+def _active_span_and_trace_hex():
+    """Return the current span plus its trace id as hex, in one pass.
+
+    The hex string is None when no valid span context is active, so callers
+    can use it both for reuse-vs-start decisions and for formatting.
+    """
+    span = trace.get_current_span()
+    if span is None:
+        return None, None
+    span_context = span.get_span_context()
+    if not span_context or not span_context.is_valid:
+        return span, None
+    return span, f"{span_context.trace_id:032x}"
+
+
 class SpanAttrKeys:
     DURATION_MS = "duration_ms"
     ERROR_CODE = "error_code"
@@ -16,10 +32,11 @@ class SpanAttrKeys:
 
 
 def set_span_attrs(span, attrs: Mapping[str, Any]) -> None:
-    for key, value in attrs.items():
-        if value is None:
-            continue
-        span.set_attribute(key, value)
+    # set_attributes takes the SDK attribute lock once for the whole mapping
+    # instead of once per key.
+    filtered = {key: value for key, value in attrs.items() if value is not None}
+    if filtered:
+        span.set_attributes(filtered)
 
 
 def set_dependency_http_attrs(
@@ -41,11 +58,18 @@ def set_dependency_http_attrs(
 
 
 class SpanOps:
+    # One SpanOps per traced operation: slots drop the per-instance __dict__.
+    __slots__ = ("_span",)
+
     def __init__(self, span) -> None:
         self._span = span
 
     def attrs(self, attrs: Mapping[str, Any]) -> SpanOps:
-        set_span_attrs(self._span, attrs)
+        # Inlined set_span_attrs: this is the chained hot path, so skip the
+        # extra Python frame per call.
+        filtered = {key: value for key, value in attrs.items() if value is not None}
+        if filtered:
+            self._span.set_attributes(filtered)
         return self
 
     def duration_ms(self, value: float, *, key: str = SpanAttrKeys.DURATION_MS) -> SpanOps:
@@ -81,6 +81,34 @@ def test_instrumented_acompletion_success(monkeypatch):
     assert "usage_details" in merged_updates
 
 
+def test_instrumented_acompletion_batch(monkeypatch):
+    from obslogpy.langfuse import litellm as lf_litellm
+
+    dummy = _DummyLangfuse()
+    monkeypatch.setattr(lf_litellm, "get_langfuse", lambda *_args, **_kwargs: dummy)
+
+    async def fake_acompletion(**kwargs):
+        content = kwargs["messages"][0]["content"]
+        if content == "boom":
+            raise ValueError("boom")
+        return {"choices": [{"message": {"content": content.upper()}}]}
+
+    monkeypatch.setattr(lf_litellm, "acompletion", fake_acompletion)
+
+    calls = [
+        {"name": "unit.batch.0", "model": "test-model", "messages": [{"role": "user", "content": "a"}]},
+        {"name": "unit.batch.1", "model": "test-model", "messages": [{"role": "user", "content": "boom"}]},
+        {"name": "unit.batch.2", "model": "test-model", "messages": [{"role": "user", "content": "c"}]},
+    ]
+    results = asyncio.run(
+        lf_litellm.instrumented_acompletion_batch(calls, max_concurrency=2)
+    )
+
+    assert results[0]["choices"][0]["message"]["content"] == "A"
+    assert isinstance(results[1], ValueError)
+    assert results[2]["choices"][0]["message"]["content"] == "C"
+
+
 def test_instrumented_acompletion_error(monkeypatch):
     from obslogpy.langfuse import litellm as lf_litellm
 
@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import asyncio
 
+import pytest
 from opentelemetry.trace import StatusCode
 
+from obslogpy.langfuse import litellm as litellm_mod
 from obslogpy.langfuse.litellm import (
     DEFAULT_TRACE_UUID,
     build_trace_headers,
@@ -11,14 +13,44 @@ from obslogpy.langfuse.litellm import (
 )
 
 
+class _AttrLog(list):
+    """Append-only (key, value) log; cheaper than a dict for a dozen attrs.
+
+    String lookups scan from the end so the latest write wins, matching
+    dict-update semantics for the handful of assertions below.
+    """
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for k, v in reversed(self):
+                if k == key:
+                    return v
+            raise KeyError(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key) -> bool:
+        return any(k == key for k, _ in self)
+
+
 class _FakeSpan:
     def __init__(self) -> None:
-        self.attrs: dict[str, object] = {}
+        self.attrs = _AttrLog()
         self.exceptions: list[Exception] = []
         self.status: tuple[object, str | None] | None = None
 
+    def reset(self) -> None:
+        self.attrs.clear()
+        self.exceptions.clear()
+        self.status = None
+
     def set_attribute(self, key: str, value: object) -> None:
-        self.attrs[key] = value
+        self.attrs.append((key, value))
+
+    def set_attributes(self, attributes: dict[str, object]) -> None:
+        self.attrs.extend(attributes.items())
+
+    def is_recording(self) -> bool:
+        return True
 
     def record_exception(self, err: Exception) -> None:
         self.exceptions.append(err)
@@ -26,13 +58,9 @@ class _FakeSpan:
     def set_status(self, code: object, description: str | None = None) -> None:
         self.status = (code, description)
 
-
-class _FakeCtx:
-    def __init__(self, span: _FakeSpan) -> None:
-        self._span = span
-
+    # The span is its own context manager, saving a wrapper object per start.
     def __enter__(self) -> _FakeSpan:
-        return self._span
+        return self
 
     def __exit__(self, exc_type, exc, tb) -> bool:
         return False
@@ -43,10 +71,41 @@ class _FakeTracer:
         self.started: list[str] = []
         self.last_span = _FakeSpan()
 
+    def reset(self) -> None:
+        self.started.clear()
+        self.last_span.reset()
+
     def start_as_current_span(self, name: str):
         self.started.append(name)
-        self.last_span = _FakeSpan()
-        return _FakeCtx(self.last_span)
+        self.last_span.reset()
+        return self.last_span
+
+
+# One tracer/span pair for the whole module, reset per test instead of
+# re-allocated per call.
+_SHARED_TRACER = _FakeTracer()
+
+# Shared request messages: built once, never mutated by the code under test.
+_MSGS = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_tracer_cache():
+    # The tests monkeypatch trace.get_tracer; clear the tracer cache on both
+    # sides so the fake tracer is neither served stale nor left cached after
+    # the patch is undone.
+    litellm_mod._cached_tracer.cache_clear()
+    yield
+    litellm_mod._cached_tracer.cache_clear()
+
+
+@pytest.fixture(scope="module")
+def loop():
+    # One loop for the module: asyncio.run would build and tear down a fresh
+    # loop, selector, and executor per test.
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
 
 
 def test_build_trace_headers() -> None:
@@ -58,18 +117,16 @@ def test_build_trace_headers() -> None:
     }
 
 
-def test_observed_instrumented_acompletion_success(monkeypatch) -> None:
-    from obslogpy.langfuse import litellm as litellm_mod
-
-    fake_tracer = _FakeTracer()
-    monkeypatch.setattr(litellm_mod.trace, "get_tracer", lambda _name: fake_tracer)
+def test_observed_instrumented_acompletion_success(monkeypatch, loop) -> None:
+    _SHARED_TRACER.reset()
+    monkeypatch.setattr(litellm_mod.trace, "get_tracer", lambda _name: _SHARED_TRACER)
 
     async def fake_instrumented(**_kwargs):
         return {"choices": [{"message": {"content": "hello"}}]}
 
     monkeypatch.setattr(litellm_mod, "instrumented_acompletion", fake_instrumented)
 
-    resp = asyncio.run(
+    resp = loop.run_until_complete(
         observed_instrumented_acompletion(
             tracer_name="mail-mvp/llm/email-write",
             span_name="EmailWriteClient.custom_email_acompletion",
@@ -77,7 +134,7 @@ def test_observed_instrumented_acompletion_success(monkeypatch) -> None:
             model="test-model",
             base_url="http://example.test",
             api_key="secret",
-            messages=[{"role": "user", "content": "hi"}],
+            messages=_MSGS,
             user_id="u-1",
             session_id="s-1",
             timeout=3,
@@ -86,21 +143,21 @@ def test_observed_instrumented_acompletion_success(monkeypatch) -> None:
     )
 
     assert resp["choices"][0]["message"]["content"] == "hello"
-    assert fake_tracer.started == ["EmailWriteClient.custom_email_acompletion"]
-    assert fake_tracer.last_span.attrs["llm.model"] == "test-model"
-    assert fake_tracer.last_span.attrs["app.user_id"] == "u-1"
-    assert fake_tracer.last_span.attrs["app.session_id"] == "s-1"
-    assert "http_request_body_preview" in fake_tracer.last_span.attrs
-    assert "\"model\": \"test-model\"" in str(fake_tracer.last_span.attrs["http_request_body_preview"])
-    assert "http_response_body_preview" in fake_tracer.last_span.attrs
-    assert fake_tracer.last_span.attrs["llm.output_length"] == 5
-
-
-def test_observed_instrumented_acompletion_error(monkeypatch) -> None:
-    from obslogpy.langfuse import litellm as litellm_mod
-
-    fake_tracer = _FakeTracer()
-    monkeypatch.setattr(litellm_mod.trace, "get_tracer", lambda _name: fake_tracer)
+    assert _SHARED_TRACER.started == ["EmailWriteClient.custom_email_acompletion"]
+    assert _SHARED_TRACER.last_span.attrs["llm.model"] == "test-model"
+    assert _SHARED_TRACER.last_span.attrs["app.user_id"] == "u-1"
+    assert _SHARED_TRACER.last_span.attrs["app.session_id"] == "s-1"
+    assert "http_request_body_preview" in _SHARED_TRACER.last_span.attrs
+    request_preview = str(_SHARED_TRACER.last_span.attrs["http_request_body_preview"])
+    # orjson and stdlib json differ in separator whitespace.
+    assert "\"model\"" in request_preview and "\"test-model\"" in request_preview
+    assert "http_response_body_preview" in _SHARED_TRACER.last_span.attrs
+    assert _SHARED_TRACER.last_span.attrs["llm.output_length"] == 5
+
+
+def test_observed_instrumented_acompletion_error(monkeypatch, loop) -> None:
+    _SHARED_TRACER.reset()
+    monkeypatch.setattr(litellm_mod.trace, "get_tracer", lambda _name: _SHARED_TRACER)
 
     async def fake_instrumented(**_kwargs):
         raise ValueError("boom")
@@ -108,19 +165,19 @@ def test_observed_instrumented_acompletion_error(monkeypatch) -> None:
     monkeypatch.setattr(litellm_mod, "instrumented_acompletion", fake_instrumented)
 
     try:
-        asyncio.run(
+        loop.run_until_complete(
             observed_instrumented_acompletion(
                 tracer_name="mail-mvp/llm/raw-search",
                 span_name="RawSearchClient.fetch",
                 generation_name="RawSearchClient.fetch",
                 model="test-model",
-                messages=[{"role": "user", "content": "hi"}],
+                messages=_MSGS,
             )
         )
         raise AssertionError("should have raised ValueError")
     except ValueError:
         pass
 
-    assert len(fake_tracer.last_span.exceptions) == 1
-    assert fake_tracer.last_span.status is not None
-    assert fake_tracer.last_span.status[0] == StatusCode.ERROR
+    assert len(_SHARED_TRACER.last_span.exceptions) == 1
+    assert _SHARED_TRACER.last_span.status is not None
+    assert _SHARED_TRACER.last_span.status[0] is StatusCode.ERROR
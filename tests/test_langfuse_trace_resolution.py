@@ -9,40 +9,44 @@ from obslogpy.langfuse.fastapi import (
 )
 
 
+# Module-level so the hex literals are built once at collection, not per id.
+_TRACE_CASES = (
+    (
+        "0123456789abcdef0123456789abcdef",
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+        "0123456789abcdef0123456789abcdef",
+        None,
+    ),
+    (
+        "0123456789ABCDEF0123456789ABCDEF",
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+        "0123456789abcdef0123456789abcdef",
+        None,
+    ),
+    (
+        None,
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+        None,
+    ),
+    (
+        "not-a-valid-trace-id",
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+        "not-a-valid-trace-id",
+    ),
+    (
+        "not-a-valid-trace-id",
+        None,
+        None,
+        "not-a-valid-trace-id",
+    ),
+)
+
+
 @pytest.mark.parametrize(
     "x_trace_id,otel_trace_id,expected_trace_id,expected_upstream_raw",
-    [
-        (
-            "0123456789abcdef0123456789abcdef",
-            "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
-            "0123456789abcdef0123456789abcdef",
-            None,
-        ),
-        (
-            "0123456789ABCDEF0123456789ABCDEF",
-            "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
-            "0123456789abcdef0123456789abcdef",
-            None,
-        ),
-        (
-            None,
-            "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
-            "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
-            None,
-        ),
-        (
-            "not-a-valid-trace-id",
-            "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
-            "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
-            "not-a-valid-trace-id",
-        ),
-        (
-            "not-a-valid-trace-id",
-            None,
-            None,
-            "not-a-valid-trace-id",
-        ),
-    ],
+    _TRACE_CASES,
 )
 def test_resolve_langfuse_trace_id(
     x_trace_id: str | None,